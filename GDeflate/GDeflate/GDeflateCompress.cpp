@@ -49,6 +49,7 @@ namespace GDeflate
         uint8_t* ptr = nullptr;
         size_t size = 0;
         size_t pos = 0;
+        bool overrun = false;
 
         template<typename T>
         void StreamOut(T* d, size_t n = 1)
@@ -58,6 +59,7 @@ namespace GDeflate
             if (pos + dataSize > size)
             {
                 printf("Fatal: stream overrun!\n");
+                overrun = true;
                 return;
             }
 
@@ -70,6 +72,7 @@ namespace GDeflate
             if (n > size)
             {
                 printf("Fatal: stream overrun!\n");
+                overrun = true;
                 return false;
             }
 
@@ -245,6 +248,10 @@ namespace GDeflate
             outputStream.StreamOut(tile.data.data(), tile.data.size());
         }
 
+        // The output buffer was too small and the stream is truncated
+        if (outputStream.overrun)
+            return false;
+
         *outputSize = outputStream.pos;
 
         return true;
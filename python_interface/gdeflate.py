@@ -1,7 +1,12 @@
 import ctypes
-from ctypes import c_bool, c_uint8, c_uint32, c_uint64, POINTER, byref
+from ctypes import c_bool, c_uint8, c_uint32, c_uint64, POINTER
+from concurrent.futures import ThreadPoolExecutor
+import os
 from pathlib import Path
-from typing import Union, Optional
+import struct
+import sys
+import threading
+from typing import Iterable, List, Optional, Union
 from enum import IntEnum
 
 class GDeflateCompressionLevel(IntEnum):
@@ -16,29 +21,142 @@ class GDeflateError(Exception):
     """Custom exception for GDeflate-related errors"""
     pass
 
-class GDeflate:
+# Every level the library accepts (GDeflate::MinimumCompressionLevel to
+# GDeflate::MaximumCompressionLevel), not just the DirectStorage presets.
+_COMPRESSION_LEVELS = range(1, 13)
+
+def _buffer_size(data) -> int:
+    """Size in bytes of any buffer-protocol object."""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return memoryview(data).nbytes
+
+def _check_contiguous(data) -> None:
+    """Raise GDeflateError if data can't be passed to the DLL as one flat run of bytes."""
+    if not memoryview(data).c_contiguous:
+        raise GDeflateError("Buffers must be C-contiguous")
+
+def _check_output(data) -> None:
+    """Raise GDeflateError if data can't be passed to the DLL as an output buffer."""
+    _check_contiguous(data)
+    if memoryview(data).readonly:
+        raise GDeflateError("Output buffer must be writable")
+
+def _as_uint8_array(data):
     """
-    A python interface for the GDeflate wrapper library.
-    
-    Args:
-        dll_path (Union[str, Path], optional): Path to the GDeflate DLL. 
-            Defaults to "GDeflateWrapper-x86_64.dll" in the current directory.
+    Expose data to the DLL as a uint8_t pointer, dispatching on its type once.
+
+    bytes objects are immutable, so their internal buffer is pointed at directly
+    (the DLL never writes to its input). NumPy arrays are pointed at through
+    their data address, which also covers read-only arrays. Other writable
+    buffers are wrapped in place; read-only ones (e.g. memoryviews of bytes)
+    cannot be, so they are copied into a ctypes array with a single memcpy
+    rather than letting from_buffer raise.
+    """
+    if isinstance(data, bytes):
+        return ctypes.cast(ctypes.c_char_p(data), POINTER(c_uint8))
+    if isinstance(data, bytearray):
+        return (c_uint8 * len(data)).from_buffer(data)
+    # Only real ndarrays: other __array_interface__ providers may omit keys or
+    # hand out a buffer object rather than an address. numpy can only have
+    # made data if it has been imported, so it isn't imported here.
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(data, numpy.ndarray):
+        if not data.flags.c_contiguous:
+            raise GDeflateError("Buffers must be C-contiguous")
+        # A pointer built from a bare address doesn't own the memory, so keep
+        # the array alive for as long as the pointer is
+        pointer = ctypes.cast(data.__array_interface__["data"][0], POINTER(c_uint8))
+        pointer._source = data
+        return pointer
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    if not view.c_contiguous:
+        raise GDeflateError("Buffers must be C-contiguous")
+    if view.readonly:
+        return (c_uint8 * view.nbytes).from_buffer_copy(view)
+    return (c_uint8 * view.nbytes).from_buffer(view)
+
+def _offset_pointer(array, offset: int):
+    """
+    Pointer to the byte at offset inside an array from _as_uint8_array.
     
-    Raises:
-        GDeflateError: If the DLL cannot be loaded or if compression/decompression fails
+    The caller must keep the original array alive while the pointer is in use.
     """
+    # addressof rather than casting the array: ctypes.cast ties the source and
+    # the result into a reference cycle, which would keep the source buffer
+    # exported until the next garbage collection.
+    if isinstance(array, ctypes.Array):
+        address = ctypes.addressof(array)
+    else:
+        address = ctypes.addressof(array.contents)
+    return ctypes.cast(address + offset, POINTER(c_uint8))
+
+# Inputs smaller than this decompress faster on the calling thread than the
+# DLL can spin up worker threads for them.
+_AUTO_WORKERS_MIN_INPUT_SIZE = 256 << 10
+_AUTO_WORKERS_MAX = 8
+
+def _resolve_workers(num_workers: Optional[int], input_size: int) -> int:
+    """Pick a worker count from the input size and CPU count when num_workers is None."""
+    if num_workers is not None:
+        # Checked here so both backends reject the same values (ctypes would
+        # wrap negative counts, cffi would raise OverflowError)
+        if not 1 <= num_workers <= 0xFFFFFFFF:
+            raise GDeflateError(f"Invalid worker count {num_workers!r}, expected at least 1")
+        return num_workers
+    if input_size < _AUTO_WORKERS_MIN_INPUT_SIZE:
+        return 1
+    return min(os.cpu_count() or 1, _AUTO_WORKERS_MAX)
+
+def _run_jobs(func, jobs: list, num_workers: int) -> None:
+    """Run func over jobs on a thread pool of num_workers, or inline for one worker."""
+    if num_workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            # Consume the results so the first failure is re-raised here
+            for _ in executor.map(func, jobs):
+                pass
+    else:
+        for job in jobs:
+            func(job)
+
+# Largest per-thread scratch buffer kept between calls. Bigger outputs cost
+# far more to produce than to allocate, so keeping them around isn't worth it.
+_SCRATCH_BUFFER_MAX_SIZE = 4 << 20
+
+# Layout of the container written by GDeflate.compress_chunked:
+# header (magic, chunk count), one entry (compressed size, uncompressed size)
+# per chunk, then the compressed chunks back to back.
+_CHUNKED_MAGIC = b"GDCH"
+_CHUNKED_HEADER = struct.Struct("<4sI")
+_CHUNKED_ENTRY = struct.Struct("<QQ")
+
+class _CtypesLibrary:
+    """The GDeflate DLL bound through ctypes."""
     
-    # Expose compression levels as class attributes
-    FASTEST = GDeflateCompressionLevel.FASTEST
-    DEFAULT = GDeflateCompressionLevel.DEFAULT
-    BEST_RATIO = GDeflateCompressionLevel.BEST_RATIO
+    as_input = staticmethod(_as_uint8_array)
+    offset = staticmethod(_offset_pointer)
+    
+    # Levels as prebuilt c_uint32 arguments, which ctypes passes through
+    # without converting a Python int on every call
+    levels = {level: c_uint32(level) for level in _COMPRESSION_LEVELS}
     
-    def __init__(self, dll_path: Union[str, Path] = "./GDeflateWrapper-x86_64.dll"):
+    def __init__(self, dll_path: Union[str, Path]):
         try:
+            # CDLL (unlike PyDLL) releases the GIL around each foreign call.
+            # Buffers are wrapped before the call, so nothing needs the GIL
+            # while the DLL runs.
             self._dll = ctypes.CDLL(str(dll_path))
         except OSError as e:
             raise GDeflateError(f"Failed to load GDeflate DLL: {e}")
         
+        # Per-thread uint64_t out-parameter, reused instead of allocating a
+        # c_uint64 and a byref() on every call
+        self._scratch = threading.local()
+        
+        # Scalar arguments are passed to these functions as plain ints: the
+        # argtypes below convert them in C, so wrapping them in c_uint64 /
+        # c_uint32 objects per call would only add allocations.
+        
         # bool gdeflate_get_uncompressed_size(
         #     uint8_t* input,
         #     uint64_t input_size,
@@ -52,11 +170,11 @@ class GDeflate:
         self._get_uncompressed_size_func.restype = c_bool
 
         # uint64_t gdeflate_get_compress_bound(uint64_t size)
-        self._get_compress_bound = self._dll.gdeflate_get_compress_bound
-        self._get_compress_bound.argtypes = [
+        self._get_compress_bound_func = self._dll.gdeflate_get_compress_bound
+        self._get_compress_bound_func.argtypes = [
             c_uint64,          # input_size
         ]
-        self._get_compress_bound.restype = c_uint64
+        self._get_compress_bound_func.restype = c_uint64
 
         # bool gdeflate_decompress(
         #     uint8_t* output,
@@ -92,6 +210,322 @@ class GDeflate:
         ]
         self._compress_func.restype = c_bool
     
+    @staticmethod
+    def as_output(data):
+        try:
+            return (c_uint8 * _buffer_size(data)).from_buffer(data)
+        except TypeError:
+            _check_output(data)
+            raise
+    
+    @staticmethod
+    def release(array) -> None:
+        """Give up the buffer export held by an array from as_input/as_output."""
+        # from_buffer keeps a memoryview of its source in _objects; pointers
+        # and copies hold no export
+        if isinstance(array, ctypes.Array) and isinstance(array._objects, dict):
+            for kept in array._objects.values():
+                if isinstance(kept, memoryview):
+                    kept.release()
+    
+    def get_uncompressed_size(self, input_array, input_size: int) -> int:
+        try:
+            uncompressed_size = self._scratch.size
+        except AttributeError:
+            uncompressed_size = self._scratch.size = c_uint64(0)
+        
+        # A c_uint64 passed for a POINTER(c_uint64) argument goes by reference
+        success = self._get_uncompressed_size_func(
+            input_array,
+            input_size,
+            uncompressed_size
+        )
+        
+        if not success:
+            # A traceback keeps the locals of every frame it passes through
+            # alive, and a wrapped array keeps its source buffer exported for
+            # as long as it lives, so a caller that catches the error could
+            # not e.g. close an mmap it passed in. Hence wrapped arrays are
+            # dropped here, and released by _WrappedBuffers in GDeflate,
+            # before an error propagates.
+            del input_array
+            raise GDeflateError("Failed to get uncompressed size")
+        
+        return uncompressed_size.value
+    
+    def get_compress_bound(self, size: int) -> int:
+        return self._get_compress_bound_func(size)
+    
+    def decompress(self, 
+                   output_array, 
+                   output_size: int, 
+                   input_array, 
+                   input_size: int, 
+                   num_workers: int) -> None:
+        success = self._decompress_func(
+            output_array,
+            output_size,
+            input_array,
+            input_size,
+            num_workers
+        )
+        
+        if not success:
+            del output_array, input_array
+            raise GDeflateError("Decompression failed")
+    
+    def compress(self, 
+                 output_array, 
+                 output_capacity: int, 
+                 input_array, 
+                 input_size: int, 
+                 level, 
+                 flags: int) -> int:
+        try:
+            output_size = self._scratch.size
+        except AttributeError:
+            output_size = self._scratch.size = c_uint64(0)
+        output_size.value = output_capacity
+        
+        success = self._compress_func(
+            output_array,
+            output_size,
+            input_array,
+            input_size,
+            level,
+            flags
+        )
+        
+        if not success:
+            del output_array, input_array
+            raise GDeflateError("Compression failed")
+        
+        return output_size.value
+
+class _CffiLibrary:
+    """
+    The GDeflate DLL bound through cffi in ABI mode.
+    
+    cffi converts scalar arguments without building Python objects and wraps
+    buffers (including immutable ones) with zero copies, so its per-call
+    overhead is lower than ctypes'. Requires the optional cffi package.
+    """
+    
+    _CDEF = """
+        bool gdeflate_get_uncompressed_size(uint8_t* input, uint64_t input_size, uint64_t* uncompressed_size);
+        uint64_t gdeflate_get_compress_bound(uint64_t size);
+        bool gdeflate_decompress(uint8_t* output, uint64_t output_size, uint8_t* input, uint64_t input_size, uint32_t num_workers);
+        bool gdeflate_compress(uint8_t* output, uint64_t* output_size, uint8_t* input, uint64_t input_size, uint32_t level, uint32_t flags);
+    """
+    
+    levels = {level: level for level in _COMPRESSION_LEVELS}
+    
+    def __init__(self, dll_path: Union[str, Path]):
+        try:
+            from cffi import FFI
+        except ImportError:
+            raise GDeflateError("The cffi backend requires the cffi package")
+        
+        self._ffi = FFI()
+        self._ffi.cdef(self._CDEF)
+        try:
+            # Like CDLL, cffi releases the GIL around each foreign call
+            self._dll = self._ffi.dlopen(str(dll_path))
+        except OSError as e:
+            raise GDeflateError(f"Failed to load GDeflate DLL: {e}")
+        
+        # Per-thread uint64_t out-parameter, reused instead of calling
+        # ffi.new on every call
+        self._scratch = threading.local()
+    
+    # cffi rejects non-contiguous buffers itself, with an exception type that
+    # depends on the buffer; only look at the buffer again once that happened.
+    
+    def as_input(self, data):
+        try:
+            return self._ffi.from_buffer("uint8_t[]", data)
+        except (BufferError, ValueError):
+            _check_contiguous(data)
+            raise
+    
+    def as_output(self, data):
+        try:
+            return self._ffi.from_buffer("uint8_t[]", data, require_writable=True)
+        except (BufferError, ValueError):
+            _check_output(data)
+            raise
+    
+    def release(self, array) -> None:
+        """Give up the buffer export held by an array from as_input/as_output."""
+        self._ffi.release(array)
+    
+    @staticmethod
+    def offset(array, offset: int):
+        return array + offset
+    
+    def get_uncompressed_size(self, input_array, input_size: int) -> int:
+        try:
+            uncompressed_size = self._scratch.size
+        except AttributeError:
+            uncompressed_size = self._scratch.size = self._ffi.new("uint64_t*")
+        
+        if not self._dll.gdeflate_get_uncompressed_size(input_array, input_size, uncompressed_size):
+            del input_array
+            raise GDeflateError("Failed to get uncompressed size")
+        
+        return uncompressed_size[0]
+    
+    def get_compress_bound(self, size: int) -> int:
+        return self._dll.gdeflate_get_compress_bound(size)
+    
+    def decompress(self, 
+                   output_array, 
+                   output_size: int, 
+                   input_array, 
+                   input_size: int, 
+                   num_workers: int) -> None:
+        if not self._dll.gdeflate_decompress(output_array, output_size, input_array, input_size, num_workers):
+            del output_array, input_array
+            raise GDeflateError("Decompression failed")
+    
+    def compress(self, 
+                 output_array, 
+                 output_capacity: int, 
+                 input_array, 
+                 input_size: int, 
+                 level, 
+                 flags: int) -> int:
+        try:
+            output_size = self._scratch.size
+        except AttributeError:
+            output_size = self._scratch.size = self._ffi.new("uint64_t*")
+        output_size[0] = output_capacity
+        
+        if not self._dll.gdeflate_compress(output_array, output_size, input_array, input_size, level, flags):
+            del output_array, input_array
+            raise GDeflateError("Compression failed")
+        
+        return output_size[0]
+
+_LIBRARY_BACKENDS = {
+    "ctypes": _CtypesLibrary,
+    "cffi": _CffiLibrary,
+}
+
+# Loaded libraries keyed by (backend, absolute dll path). Bindings hold no
+# per-call state, so every GDeflate instance for the same DLL shares one of
+# them instead of reloading the DLL and redeclaring its signatures. The path
+# is made absolute so a relative one (like the default) still refers to the
+# directory it was loaded from after a chdir.
+_library_cache = {}
+_library_cache_lock = threading.Lock()
+
+def _load_library(backend: str, dll_path: Union[str, Path]):
+    key = (backend, os.path.abspath(dll_path))
+    with _library_cache_lock:
+        library = _library_cache.get(key)
+        if library is None:
+            library = _library_cache[key] = _LIBRARY_BACKENDS[backend](dll_path)
+        return library
+
+class _WrappedBuffers:
+    """
+    Wraps buffers for one GDeflate call and releases them all if the call fails.
+    
+    Used where wrapped arrays outlive a single DLL call (as locals or in job
+    lists), see _CtypesLibrary.get_uncompressed_size for why that matters.
+    """
+    
+    def __init__(self, lib):
+        self._lib = lib
+        self._arrays = []
+    
+    def __enter__(self) -> "_WrappedBuffers":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        if exc_type is not None:
+            for array in self._arrays:
+                self._lib.release(array)
+    
+    def input(self, data):
+        array = self._lib.as_input(data)
+        self._arrays.append(array)
+        return array
+    
+    def output(self, data):
+        array = self._lib.as_output(data)
+        self._arrays.append(array)
+        return array
+
+class GDeflate:
+    """
+    A python interface for the GDeflate wrapper library.
+    
+    Instances can be shared between threads. The GIL is released for the
+    duration of every DLL call, so independent payloads can be compressed or
+    decompressed concurrently from a ThreadPoolExecutor.
+    
+    compress and decompress write into a per-thread scratch buffer that is kept
+    between calls, so a thread that processes many similarly sized payloads
+    stops allocating output buffers after the first few calls. The buffer is
+    capped at a few MiB; larger outputs are allocated per call.
+    
+    Args:
+        dll_path (Union[str, Path], optional): Path to the GDeflate DLL. 
+            Defaults to "GDeflateWrapper-x86_64.dll" in the current directory.
+        backend (str, optional): FFI used to call the DLL, "ctypes" (default) or
+            "cffi". cffi has lower per-call overhead, which matters when calling
+            in tight loops on small payloads, but must be installed separately.
+    
+    Raises:
+        GDeflateError: If the DLL cannot be loaded or if compression/decompression fails
+    """
+    
+    # Expose compression levels as class attributes
+    FASTEST = GDeflateCompressionLevel.FASTEST
+    DEFAULT = GDeflateCompressionLevel.DEFAULT
+    BEST_RATIO = GDeflateCompressionLevel.BEST_RATIO
+    
+    def __init__(self, 
+                 dll_path: Union[str, Path] = "./GDeflateWrapper-x86_64.dll", 
+                 backend: str = "ctypes"):
+        if backend not in _LIBRARY_BACKENDS:
+            raise GDeflateError(
+                f"Unknown backend {backend!r}, expected one of {sorted(_LIBRARY_BACKENDS)}")
+        
+        self._lib = _load_library(backend, dll_path)
+        self._scratch = threading.local()
+    
+    def _scratch_buffer(self, size: int) -> bytearray:
+        """
+        Get this thread's scratch buffer, grown to at least size bytes.
+        
+        The buffer at least doubles whenever it grows, so a sequence of
+        increasingly large payloads only reallocates a logarithmic number of times.
+        Payloads above _SCRATCH_BUFFER_MAX_SIZE get a one-off buffer instead, so
+        a single large asset doesn't stay allocated on the thread afterwards.
+        """
+        if size > _SCRATCH_BUFFER_MAX_SIZE:
+            return bytearray(size)
+        
+        buffer = getattr(self._scratch, "buffer", None)
+        if buffer is None or len(buffer) < size:
+            new_size = min(max(size, 2 * len(buffer) if buffer is not None else 0),
+                           _SCRATCH_BUFFER_MAX_SIZE)
+            # Release the old buffer first so both are never alive at once
+            self._scratch.buffer = buffer = None
+            buffer = self._scratch.buffer = bytearray(new_size)
+        return buffer
+    
+    def release_scratch_buffer(self) -> None:
+        """
+        Free the calling thread's scratch buffer.
+        
+        It is allocated again, starting small, on the next compress or decompress.
+        """
+        self._scratch.buffer = None
+    
     def get_uncompressed_size(self, compressed_data: Union[bytes, bytearray]) -> int:
         """
         Get the uncompressed size of compressed data.
@@ -105,29 +539,43 @@ class GDeflate:
         Raises:
             GDeflateError: If the size calculation fails
         """
-        input_array = (c_uint8 * len(compressed_data))(*compressed_data)
-        uncompressed_size = c_uint64(0)
-        
-        success = self._get_uncompressed_size_func(
-            input_array,
-            c_uint64(len(compressed_data)),
-            byref(uncompressed_size)
-        )
+        return self._lib.get_uncompressed_size(
+            self._lib.as_input(compressed_data),
+            _buffer_size(compressed_data))
+    
+    def get_compress_bound(self, size: int) -> int:
+        """
+        Get the worst-case compressed size for an input of the given size.
         
-        if not success:
-            raise GDeflateError("Failed to get uncompressed size")
+        Args:
+            size: The size of the uncompressed input in bytes
+            
+        Returns:
+            int: The minimum output buffer size required by compress_into
+        """
+        return self._lib.get_compress_bound(size)
+    
+    def warmup(self) -> None:
+        """
+        Run a small compress/decompress round trip ahead of latency-sensitive work.
         
-        return uncompressed_size.value
+        The DLL starts its worker threads per call rather than keeping a pool, but
+        the first call still pays for one-time setup: libdeflate's CPU feature
+        detection, faulting in the DLL's code and sizing this thread's scratch
+        buffer. Calling this once up front keeps that cost off the first real call.
+        """
+        self.decompress(self.compress(bytes(4096)), num_workers=os.cpu_count() or 1)
     
     def decompress(self, 
                   compressed_data: Union[bytes, bytearray], 
-                  num_workers: int = 1) -> bytes:
+                  num_workers: Optional[int] = None) -> bytes:
         """
         Decompress GDeflate-compressed data.
         
         Args:
             compressed_data: The compressed data as bytes or bytearray
-            num_workers: Number of worker threads to use (default: 1)
+            num_workers: Number of worker threads to use (default: None, which uses
+                one thread for small inputs and up to 8 for large ones)
             
         Returns:
             bytes: The decompressed data
@@ -135,25 +583,57 @@ class GDeflate:
         Raises:
             GDeflateError: If decompression fails
         """
-        # Get the uncompressed size first
-        output_size = self.get_uncompressed_size(compressed_data)
+        input_size = _buffer_size(compressed_data)
+        with _WrappedBuffers(self._lib) as buffers:
+            # The input is wrapped once and shared by both DLL calls
+            input_array = buffers.input(compressed_data)
+            output_size = self._lib.get_uncompressed_size(input_array, input_size)
+            
+            output_buffer = self._scratch_buffer(output_size)
+            self._lib.decompress(
+                self._lib.as_output(output_buffer), output_size,
+                input_array, input_size,
+                _resolve_workers(num_workers, input_size))
         
-        # Prepare input and output buffers
-        input_array = (c_uint8 * len(compressed_data))(*compressed_data)
-        output_array = (c_uint8 * output_size)()
+        return bytes(memoryview(output_buffer)[:output_size])
+    
+    def decompress_into(self, 
+                       output, 
+                       compressed_data, 
+                       num_workers: Optional[int] = None) -> int:
+        """
+        Decompress GDeflate-compressed data directly into a caller-provided buffer.
         
-        success = self._decompress_func(
-            output_array,
-            c_uint64(output_size),
-            input_array,
-            c_uint64(len(compressed_data)),
-            c_uint32(num_workers)
-        )
+        Nothing is allocated per call, so callers that keep a scratch buffer around
+        (e.g. when streaming many assets) can decompress without any copies.
         
-        if not success:
-            raise GDeflateError("Decompression failed")
+        Args:
+            output: A writable buffer (bytearray, memoryview, mmap, ...) of at least
+                get_uncompressed_size(compressed_data) bytes
+            compressed_data: The compressed data as any buffer-protocol object
+            num_workers: Number of worker threads to use (default: None, which uses
+                one thread for small inputs and up to 8 for large ones)
+            
+        Returns:
+            int: The number of bytes written to output
+            
+        Raises:
+            GDeflateError: If the output buffer is too small or decompression fails
+        """
+        input_size = _buffer_size(compressed_data)
+        with _WrappedBuffers(self._lib) as buffers:
+            input_array = buffers.input(compressed_data)
+            output_size = self._lib.get_uncompressed_size(input_array, input_size)
+            if _buffer_size(output) < output_size:
+                raise GDeflateError(
+                    f"Output buffer too small: {output_size} bytes required")
+            
+            self._lib.decompress(
+                buffers.output(output), output_size,
+                input_array, input_size,
+                _resolve_workers(num_workers, input_size))
         
-        return bytes(output_array)
+        return output_size
     
     def compress(self, 
                 data: Union[bytes, bytearray], 
@@ -173,27 +653,449 @@ class GDeflate:
         Raises:
             GDeflateError: If compression fails
         """
-
+        level_argument = self._level_argument(level)
+        
         # Get size of output buffer to allocate,
         # small inputs _can_ compress to be larger than the input buffer.
-        bounded_output_size = self._get_compress_bound(c_uint64(len(data)))
-
-        # Allocate input/output buffers and output size var.
-        output_size = c_uint64(bounded_output_size)
-        output_array = (c_uint8 * bounded_output_size)()
-        input_array = (c_uint8 * len(data))(*data)
+        output_buffer = self._scratch_buffer(self.get_compress_bound(_buffer_size(data)))
+        output_size = self._compress_into(output_buffer, data, level_argument, flags)
         
-        success = self._compress_func(
-            output_array,
-            byref(output_size),
-            input_array,
-            c_uint64(len(data)),
-            c_uint32(int(level)),  # Convert enum to int if needed
-            c_uint32(flags)
-        )
+        # Return only the actual compressed bytes
+        return bytes(memoryview(output_buffer)[:output_size])
+    
+    def compress_into(self, 
+                     output, 
+                     data, 
+                     level: Union[int, GDeflateCompressionLevel] = GDeflateCompressionLevel.DEFAULT, 
+                     flags: int = 0) -> int:
+        """
+        Compress data using GDeflate directly into a caller-provided buffer.
         
-        if not success:
-            raise GDeflateError("Compression failed")
+        The library only notices that the output buffer is too small after all of
+        the compression work is done, so output must hold at least
+        get_compress_bound(len(data)) bytes and this is checked up front. A pooled
+        buffer of that size can be reused across calls to avoid all allocation.
         
-        # Return only the actual compressed bytes
-        return bytes(output_array[:output_size.value])
\ No newline at end of file
+        Args:
+            output: A writable buffer (bytearray, memoryview, mmap, ...)
+            data: The data to compress as any buffer-protocol object
+            level: Compression level (default: DEFAULT). Use GDeflateCompressionLevel enum or class constants
+            flags: Compression flags (default: 0)
+            
+        Returns:
+            int: The number of compressed bytes written to the start of output
+            
+        Raises:
+            GDeflateError: If the output buffer is too small or compression fails
+        """
+        return self._compress_into(output, data, self._level_argument(level), flags)
+    
+    def _compress_into(self, output, data, level_argument, flags: int) -> int:
+        """compress_into with a level already converted by _level_argument."""
+        input_size = _buffer_size(data)
+        output_capacity = _buffer_size(output)
+        required_size = self.get_compress_bound(input_size)
+        if output_capacity < required_size:
+            raise GDeflateError(
+                f"Output buffer too small: {required_size} bytes required")
+        
+        return self._lib.compress(
+            self._lib.as_output(output), output_capacity,
+            self._lib.as_input(data), input_size,
+            level_argument, flags)
+    
+    def _level_argument(self, level: Union[int, GDeflateCompressionLevel]):
+        """Validate a compression level and convert it to the backend's argument form."""
+        # The levels dict alone would also accept True and 9.0, which hash
+        # like the ints they compare equal to
+        if isinstance(level, int) and not isinstance(level, bool):
+            argument = self._lib.levels.get(level)
+        else:
+            argument = None
+        if argument is None:
+            raise GDeflateError(
+                f"Invalid compression level {level!r}, expected "
+                f"{_COMPRESSION_LEVELS.start} to {_COMPRESSION_LEVELS.stop - 1}")
+        return argument
+    
+    def decompress_many(self, 
+                       compressed_blobs: Iterable, 
+                       num_workers: Optional[int] = None) -> List[bytes]:
+        """
+        Decompress many independent GDeflate streams in one batch.
+        
+        All sizes are read first so every output can be carved out of one
+        shared allocation, then the streams are decompressed concurrently on a
+        thread pool. For many small blobs this amortizes the per-call overhead
+        of decompress and keeps all cores busy.
+        
+        Args:
+            compressed_blobs: The compressed streams, each as any buffer-protocol
+                object. Any iterable works, including a generator of temporaries.
+            num_workers: Number of streams decompressed concurrently (default: None,
+                which uses one thread for small inputs and up to 8 for large ones)
+            
+        Returns:
+            List[bytes]: The decompressed data, in the same order as the input
+            
+        Raises:
+            GDeflateError: If any stream fails to decompress
+        """
+        jobs = []
+        input_total = 0
+        output_total = 0
+        with _WrappedBuffers(self._lib) as buffers:
+            for blob in compressed_blobs:
+                input_array = buffers.input(blob)
+                input_size = _buffer_size(blob)
+                output_size = self._lib.get_uncompressed_size(input_array, input_size)
+                # The blob rides along with its wrapped array: the batch may
+                # hold the only reference to it (e.g. blobs from a generator)
+                jobs.append((output_total, output_size, input_array, input_size, blob))
+                input_total += input_size
+                output_total += output_size
+            
+            output_buffer = bytearray(output_total)
+            output_array = buffers.output(output_buffer)
+            
+            def decompress_blob(job):
+                blob_output_offset, blob_output_size, blob_array, blob_input_size, _ = job
+                self._lib.decompress(
+                    self._lib.offset(output_array, blob_output_offset), blob_output_size,
+                    blob_array, blob_input_size,
+                    1)
+            
+            _run_jobs(decompress_blob, jobs, _resolve_workers(num_workers, input_total))
+        
+        output_view = memoryview(output_buffer)
+        return [bytes(output_view[offset:offset + size]) for offset, size, *_ in jobs]
+    
+    def decompress_ndarray(self, 
+                          compressed_data: "np.ndarray", 
+                          num_workers: Optional[int] = None) -> "np.ndarray":
+        """
+        Decompress GDeflate-compressed data held in a NumPy array.
+        
+        The input is passed to the DLL without copying and the output is
+        decompressed straight into a new uint8 array. Requires numpy.
+        
+        Args:
+            compressed_data: The compressed data as a C-contiguous array of any dtype
+            num_workers: Number of worker threads to use (default: None, which uses
+                one thread for small inputs and up to 8 for large ones)
+            
+        Returns:
+            np.ndarray: The decompressed data as a uint8 array
+            
+        Raises:
+            GDeflateError: If the array is not C-contiguous or decompression fails
+        """
+        import numpy as np
+        
+        if not compressed_data.flags.c_contiguous:
+            raise GDeflateError("Arrays must be C-contiguous")
+        
+        input_size = compressed_data.nbytes
+        with _WrappedBuffers(self._lib) as buffers:
+            # The input is wrapped once and shared by both DLL calls
+            input_array = buffers.input(compressed_data)
+            output_size = self._lib.get_uncompressed_size(input_array, input_size)
+            
+            output = np.empty(output_size, dtype=np.uint8)
+            self._lib.decompress(
+                self._lib.as_output(output), output_size,
+                input_array, input_size,
+                _resolve_workers(num_workers, input_size))
+        
+        return output
+    
+    def compress_ndarray(self, 
+                        data: "np.ndarray", 
+                        level: Union[int, GDeflateCompressionLevel] = GDeflateCompressionLevel.DEFAULT, 
+                        flags: int = 0) -> "np.ndarray":
+        """
+        Compress the contents of a NumPy array using GDeflate.
+        
+        The raw bytes of the array are compressed without copying them, then
+        the compressed bytes are copied out of the scratch buffer into a new
+        uint8 array of exactly their size. Requires numpy.
+        
+        Args:
+            data: The data to compress as a C-contiguous array of any dtype
+            level: Compression level (default: DEFAULT). Use GDeflateCompressionLevel enum or class constants
+            flags: Compression flags (default: 0)
+            
+        Returns:
+            np.ndarray: The compressed data as a uint8 array
+            
+        Raises:
+            GDeflateError: If the array is not C-contiguous or compression fails
+        """
+        import numpy as np
+        
+        if not data.flags.c_contiguous:
+            raise GDeflateError("Arrays must be C-contiguous")
+        
+        level_argument = self._level_argument(level)
+        output_buffer = self._scratch_buffer(self.get_compress_bound(data.nbytes))
+        output_size = self._compress_into(output_buffer, data, level_argument, flags)
+        
+        # Copy out only the compressed bytes, like compress, rather than
+        # returning a view that keeps the whole worst-case allocation alive
+        return np.frombuffer(output_buffer, dtype=np.uint8, count=output_size).copy()
+    
+    def compress_chunked(self, 
+                        data, 
+                        chunk_size: int = 1 << 20, 
+                        level: Union[int, GDeflateCompressionLevel] = GDeflateCompressionLevel.DEFAULT, 
+                        flags: int = 0) -> bytes:
+        """
+        Compress data as a sequence of independently compressed chunks.
+        
+        The result is a small container: a header listing the compressed and
+        uncompressed size of every chunk, followed by the GDeflate streams
+        back to back. Because each chunk is self-contained, decompress_chunked
+        can decompress them concurrently into disjoint slices of one output.
+        
+        Args:
+            data: The data to compress as any buffer-protocol object
+            chunk_size: Uncompressed bytes per chunk (default: 1 MiB)
+            level: Compression level (default: DEFAULT). Use GDeflateCompressionLevel enum or class constants
+            flags: Compression flags (default: 0)
+            
+        Returns:
+            bytes: The chunked container
+            
+        Raises:
+            GDeflateError: If compression fails
+        """
+        if chunk_size <= 0:
+            raise GDeflateError("Chunk size must be positive")
+        
+        level_argument = self._level_argument(level)
+        input_size = _buffer_size(data)
+        chunk_sizes = [min(chunk_size, input_size - offset)
+                       for offset in range(0, input_size, chunk_size)]
+        
+        # Every chunk is compressed straight into its final position, so the
+        # output is sized for the worst case of all chunks together.
+        header_size = _CHUNKED_HEADER.size + _CHUNKED_ENTRY.size * len(chunk_sizes)
+        output_buffer = bytearray(header_size + sum(self.get_compress_bound(size) for size in chunk_sizes))
+        
+        _CHUNKED_HEADER.pack_into(output_buffer, 0, _CHUNKED_MAGIC, len(chunk_sizes))
+        input_offset = 0
+        output_offset = header_size
+        with _WrappedBuffers(self._lib) as buffers:
+            output_array = buffers.output(output_buffer)
+            input_array = buffers.input(data)
+            
+            for index, size in enumerate(chunk_sizes):
+                compressed_size = self._lib.compress(
+                    self._lib.offset(output_array, output_offset), len(output_buffer) - output_offset,
+                    self._lib.offset(input_array, input_offset), size,
+                    level_argument, flags)
+                _CHUNKED_ENTRY.pack_into(
+                    output_buffer, _CHUNKED_HEADER.size + _CHUNKED_ENTRY.size * index,
+                    compressed_size, size)
+                input_offset += size
+                output_offset += compressed_size
+        
+        return bytes(memoryview(output_buffer)[:output_offset])
+    
+    def decompress_chunked(self, 
+                          chunked_data, 
+                          num_workers: Optional[int] = None) -> bytearray:
+        """
+        Decompress a container produced by compress_chunked.
+        
+        Chunks are dispatched to a thread pool and each one is decompressed
+        into its own slice of a single preallocated output. The GIL is
+        released while the DLL runs, so the chunks genuinely decompress in
+        parallel. That output is returned as is rather than copied to bytes,
+        so peak memory stays at one copy of the decompressed data.
+        
+        Args:
+            chunked_data: The chunked container as any buffer-protocol object
+            num_workers: Number of chunks decompressed concurrently (default: None,
+                which uses one thread for small inputs and up to 8 for large ones)
+            
+        Returns:
+            bytearray: The decompressed data
+            
+        Raises:
+            GDeflateError: If the container is malformed or decompression fails
+        """
+        input_size = _buffer_size(chunked_data)
+        try:
+            magic, num_chunks = _CHUNKED_HEADER.unpack_from(chunked_data, 0)
+            entries = [_CHUNKED_ENTRY.unpack_from(chunked_data, _CHUNKED_HEADER.size + _CHUNKED_ENTRY.size * index)
+                       for index in range(num_chunks)]
+        except struct.error as e:
+            raise GDeflateError(f"Invalid chunked stream: {e}")
+        
+        if magic != _CHUNKED_MAGIC:
+            raise GDeflateError("Invalid chunked stream: bad magic")
+        
+        input_offset = _CHUNKED_HEADER.size + _CHUNKED_ENTRY.size * num_chunks
+        output_offset = 0
+        jobs = []
+        with _WrappedBuffers(self._lib) as buffers:
+            input_array = buffers.input(chunked_data)
+            for compressed_size, uncompressed_size in entries:
+                if input_offset + compressed_size > input_size:
+                    raise GDeflateError("Invalid chunked stream: truncated chunk")
+                
+                # The DLL trusts the stream header for the output size, so make sure
+                # it agrees with the slice the chunk is about to be written into.
+                chunk_array = self._lib.offset(input_array, input_offset)
+                if self._lib.get_uncompressed_size(chunk_array, compressed_size) != uncompressed_size:
+                    raise GDeflateError("Invalid chunked stream: chunk size mismatch")
+                
+                jobs.append((output_offset, uncompressed_size, chunk_array, compressed_size))
+                input_offset += compressed_size
+                output_offset += uncompressed_size
+            
+            output_buffer = bytearray(output_offset)
+            output_array = buffers.output(output_buffer)
+            
+            def decompress_chunk(job):
+                chunk_output_offset, chunk_output_size, chunk_array, chunk_input_size = job
+                self._lib.decompress(
+                    self._lib.offset(output_array, chunk_output_offset), chunk_output_size,
+                    chunk_array, chunk_input_size,
+                    1)
+            
+            _run_jobs(decompress_chunk, jobs, _resolve_workers(num_workers, input_size))
+        
+        return output_buffer
+    
+    def compress_chunked_file(self, 
+                             input_path: Union[str, Path], 
+                             output_path: Union[str, Path], 
+                             chunk_size: int = 8 << 20, 
+                             level: Union[int, GDeflateCompressionLevel] = GDeflateCompressionLevel.DEFAULT, 
+                             flags: int = 0) -> int:
+        """
+        Compress a file into the compress_chunked container, one chunk at a time.
+        
+        Only a single chunk and its compressed form are held in memory, so
+        files of any size can be compressed with memory bounded by chunk_size.
+        
+        Args:
+            input_path: Path of the file to compress
+            output_path: Path of the container to write
+            chunk_size: Uncompressed bytes per chunk (default: 8 MiB)
+            level: Compression level (default: DEFAULT). Use GDeflateCompressionLevel enum or class constants
+            flags: Compression flags (default: 0)
+            
+        Returns:
+            int: The size of the written container in bytes
+            
+        Raises:
+            GDeflateError: If compression fails
+        """
+        if chunk_size <= 0:
+            raise GDeflateError("Chunk size must be positive")
+        
+        level_argument = self._level_argument(level)
+        with open(input_path, "rb") as input_file, open(output_path, "wb") as output_file:
+            input_size = os.fstat(input_file.fileno()).st_size
+            num_chunks = (input_size + chunk_size - 1) // chunk_size
+            
+            # The entries are only known once every chunk has been compressed,
+            # so reserve their space now and fill them in at the end.
+            output_file.write(_CHUNKED_HEADER.pack(_CHUNKED_MAGIC, num_chunks))
+            output_file.write(bytes(_CHUNKED_ENTRY.size * num_chunks))
+            
+            input_buffer = bytearray(min(chunk_size, input_size))
+            output_buffer = bytearray(self.get_compress_bound(len(input_buffer)))
+            entries = []
+            for _ in range(num_chunks):
+                size = input_file.readinto(input_buffer)
+                if size == 0:
+                    raise GDeflateError("Input file shrank while being compressed")
+                
+                compressed_size = self._compress_into(
+                    output_buffer, memoryview(input_buffer)[:size], level_argument, flags)
+                output_file.write(memoryview(output_buffer)[:compressed_size])
+                entries.append(_CHUNKED_ENTRY.pack(compressed_size, size))
+            
+            output_size = output_file.tell()
+            output_file.seek(_CHUNKED_HEADER.size)
+            output_file.write(b"".join(entries))
+        
+        return output_size
+    
+    def decompress_chunked_file(self, 
+                               input_path: Union[str, Path], 
+                               output_path: Union[str, Path], 
+                               num_workers: Optional[int] = None) -> int:
+        """
+        Decompress a compress_chunked container file into another file.
+        
+        Chunks are read, decompressed on a thread pool and written to their
+        offset in the output file independently, so memory use is bounded by
+        num_workers times the chunk size rather than by the file size.
+        
+        Args:
+            input_path: Path of the container to decompress
+            output_path: Path of the file to write
+            num_workers: Number of chunks decompressed concurrently (default: None,
+                which uses one thread for small inputs and up to 8 for large ones)
+            
+        Returns:
+            int: The size of the decompressed file in bytes
+            
+        Raises:
+            GDeflateError: If the container is malformed or decompression fails
+        """
+        with open(input_path, "rb") as input_file:
+            input_size = os.fstat(input_file.fileno()).st_size
+            try:
+                magic, num_chunks = _CHUNKED_HEADER.unpack(input_file.read(_CHUNKED_HEADER.size))
+            except struct.error as e:
+                raise GDeflateError(f"Invalid chunked stream: {e}")
+            
+            if magic != _CHUNKED_MAGIC:
+                raise GDeflateError("Invalid chunked stream: bad magic")
+            
+            entries_data = input_file.read(_CHUNKED_ENTRY.size * num_chunks)
+            if len(entries_data) != _CHUNKED_ENTRY.size * num_chunks:
+                raise GDeflateError("Invalid chunked stream: truncated header")
+            
+            input_offset = _CHUNKED_HEADER.size + len(entries_data)
+            output_offset = 0
+            jobs = []
+            for compressed_size, uncompressed_size in _CHUNKED_ENTRY.iter_unpack(entries_data):
+                if input_offset + compressed_size > input_size:
+                    raise GDeflateError("Invalid chunked stream: truncated chunk")
+                
+                jobs.append((input_offset, compressed_size, output_offset, uncompressed_size))
+                input_offset += compressed_size
+                output_offset += uncompressed_size
+            
+            with open(output_path, "wb") as output_file:
+                output_file.truncate(output_offset)
+                
+                # Both files are shared by all workers, so every seek + read/write
+                # pair happens under the lock; decompression itself runs unlocked.
+                io_lock = threading.Lock()
+                
+                def decompress_chunk(job):
+                    chunk_input_offset, chunk_input_size, chunk_output_offset, chunk_output_size = job
+                    chunk_input = bytearray(chunk_input_size)
+                    with io_lock:
+                        input_file.seek(chunk_input_offset)
+                        input_file.readinto(chunk_input)
+                    
+                    chunk_output = bytearray(chunk_output_size)
+                    if self.decompress_into(chunk_output, chunk_input, 1) != chunk_output_size:
+                        raise GDeflateError("Invalid chunked stream: chunk size mismatch")
+                    
+                    with io_lock:
+                        output_file.seek(chunk_output_offset)
+                        output_file.write(chunk_output)
+                
+                _run_jobs(decompress_chunk, jobs, _resolve_workers(num_workers, input_size))
+        
+        return output_offset
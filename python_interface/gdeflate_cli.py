@@ -1,19 +1,25 @@
 import argparse
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+import io
+import json
+import mmap
+from multiprocessing.connection import Client, Listener
+import os
 from pathlib import Path
 import sys
-from typing import Optional
+from typing import Optional, Tuple
 
 from gdeflate import GDeflate, GDeflateCompressionLevel, GDeflateError
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Compress or decompress files using GDeflate")
     
-    parser.add_argument("input", type=Path,
+    parser.add_argument("input", type=Path, nargs="?",
                       help="Input file path")
-    parser.add_argument("output", type=Path,
+    parser.add_argument("output", type=Path, nargs="?",
                       help="Output file path")
     
-    action_group = parser.add_mutually_exclusive_group(required=True)
+    action_group = parser.add_mutually_exclusive_group()
     action_group.add_argument("-c", "--compress",
                           action="store_true",
                           help="Compress the input file")
@@ -29,81 +35,182 @@ def parse_args() -> argparse.Namespace:
     
     parser.add_argument("-w", "--workers",
                       type=int,
-                      default=1,
-                      help="Number of worker threads for decompression")
+                      default=0,
+                      help="Number of worker threads for decompression (0=auto from input size and CPU count)")
+    
+    parser.add_argument("-q", "--quiet",
+                      action="store_true",
+                      help="Don't print size statistics")
+    
+    parser.add_argument("--chunked",
+                      action="store_true",
+                      help="Use the chunked container, streaming large files with bounded memory")
+    
+    parser.add_argument("--chunk-size",
+                      type=int,
+                      default=8 << 20,
+                      help="Uncompressed bytes per chunk with --chunked (default: 8 MiB)")
     
     parser.add_argument("--dll",
                       type=Path,
                       default="./GDeflateWrapper-x86_64.dll",
                       help="Path to GDeflate DLL")
     
-    return parser.parse_args()
+    server_group = parser.add_mutually_exclusive_group()
+    server_group.add_argument("--serve",
+                          metavar="ADDRESS",
+                          help="Keep the DLL loaded and handle --client requests on ADDRESS "
+                               "(a socket path, or \\\\.\\pipe\\NAME on Windows). Both sides "
+                               "must set GDEFLATE_SERVER_KEY to the same secret")
+    server_group.add_argument("--client",
+                          metavar="ADDRESS",
+                          help="Hand this request to a --serve process instead of loading the DLL")
+    
+    args = parser.parse_args()
+    
+    if args.serve is None and (args.input is None or args.output is None
+                               or not (args.compress or args.decompress)):
+        parser.error("input, output and one of -c/-d are required unless --serve is given")
+    
+    if (args.serve is not None or args.client is not None) and server_authkey() is None:
+        parser.error("--serve and --client require the GDEFLATE_SERVER_KEY environment variable")
+    
+    return args
+
+@contextmanager
+def map_input(input_path: Path):
+    """Map a file for reading instead of copying it into memory"""
+    with open(input_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            yield b""
+            return
+        
+        # ACCESS_COPY rather than ACCESS_READ: ctypes can only wrap buffers that
+        # look writable without copying them. Nothing ever writes to the mapping,
+        # so no page is actually copied.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) as mapping:
+            yield mapping
+
+@contextmanager
+def remove_on_failure(output_path: Path):
+    """Don't leave a truncated or partially written file behind"""
+    try:
+        yield
+    except BaseException:
+        output_path.unlink(missing_ok=True)
+        raise
+
+@contextmanager
+def create_output(output_path: Path):
+    """Open the output file, removing it again if writing it fails"""
+    with remove_on_failure(output_path):
+        with open(output_path, "w+b") as f:
+            yield f
+
+@contextmanager
+def map_output(f, size: int):
+    """Resize the output file and map it for writing"""
+    f.truncate(size)
+    with mmap.mmap(f.fileno(), size) as mapping:
+        yield mapping
+
+def format_ratio(part: int, whole: int) -> str:
+    """Format part as a percentage of whole, which is 0 for empty --chunked files"""
+    return f"{(part / whole) * 100:.1f}%" if whole else "n/a"
 
 def compress_file(gdeflate: GDeflate, 
                  input_path: Path, 
                  output_path: Path, 
-                 level: int) -> None:
+                 level: int,
+                 chunk_size: Optional[int] = None,
+                 quiet: bool = False) -> None:
     """Compress a file using GDeflate"""
     try:
-        with open(input_path, "rb") as f:
-            input_data = f.read()
-        
-        compressed = gdeflate.compress(input_data, level=level)
-        
-        with open(output_path, "wb") as f:
-            f.write(compressed)
-            
-        orig_size = len(input_data)
-        comp_size = len(compressed)
-        ratio = (comp_size / orig_size) * 100
+        if chunk_size is not None:
+            orig_size = input_path.stat().st_size
+            with remove_on_failure(output_path):
+                comp_size = gdeflate.compress_chunked_file(
+                    input_path, output_path, chunk_size=chunk_size, level=level)
+        else:
+            orig_size, comp_size = compress_mapped(gdeflate, input_path, output_path, level)
         
-        print(f"Compressed {input_path}")
-        print(f"Original size: {orig_size:,} bytes")
-        print(f"Compressed size: {comp_size:,} bytes")
-        print(f"Compression ratio: {ratio:.1f}%")
+        if not quiet:
+            print(f"Compressed {input_path}")
+            print(f"Original size: {orig_size:,} bytes")
+            print(f"Compressed size: {comp_size:,} bytes")
+            print(f"Compression ratio: {format_ratio(comp_size, orig_size)}")
         
     except IOError as e:
         print(f"Error accessing file: {e}", file=sys.stderr)
         sys.exit(1)
 
+def compress_mapped(gdeflate: GDeflate, 
+                   input_path: Path, 
+                   output_path: Path, 
+                   level: int) -> Tuple[int, int]:
+    """Compress a file as a single GDeflate stream, returning the input and output sizes"""
+    with map_input(input_path) as input_data:
+        orig_size = len(input_data)
+        
+        # Compress straight into the mapped output file, then trim it to
+        # the actual compressed size once the mapping is closed.
+        with create_output(output_path) as f:
+            with map_output(f, gdeflate.get_compress_bound(orig_size)) as output:
+                comp_size = gdeflate.compress_into(output, input_data, level=level)
+            f.truncate(comp_size)
+    
+    return orig_size, comp_size
+
 def decompress_file(gdeflate: GDeflate, 
                    input_path: Path, 
                    output_path: Path, 
-                   num_workers: int) -> None:
+                   num_workers: Optional[int],
+                   chunked: bool = False,
+                   quiet: bool = False) -> None:
     """Decompress a file using GDeflate"""
     try:
-        with open(input_path, "rb") as f:
-            input_data = f.read()
-            
-        decompressed = gdeflate.decompress(input_data, num_workers=num_workers)
-        
-        with open(output_path, "wb") as f:
-            f.write(decompressed)
-            
-        comp_size = len(input_data)
-        decomp_size = len(decompressed)
-        ratio = (comp_size / decomp_size) * 100
+        if chunked:
+            comp_size = input_path.stat().st_size
+            with remove_on_failure(output_path):
+                decomp_size = gdeflate.decompress_chunked_file(
+                    input_path, output_path, num_workers=num_workers)
+        else:
+            comp_size, decomp_size = decompress_mapped(gdeflate, input_path, output_path, num_workers)
         
-        print(f"Decompressed {input_path}")
-        print(f"Compressed size: {comp_size:,} bytes")
-        print(f"Decompressed size: {decomp_size:,} bytes")
-        print(f"Compression ratio was: {ratio:.1f}%")
+        if not quiet:
+            print(f"Decompressed {input_path}")
+            print(f"Compressed size: {comp_size:,} bytes")
+            print(f"Decompressed size: {decomp_size:,} bytes")
+            print(f"Compression ratio was: {format_ratio(comp_size, decomp_size)}")
         
     except IOError as e:
         print(f"Error accessing file: {e}", file=sys.stderr)
         sys.exit(1)
 
-def main() -> None:
-    args = parse_args()
+def decompress_mapped(gdeflate: GDeflate, 
+                     input_path: Path, 
+                     output_path: Path, 
+                     num_workers: Optional[int]) -> Tuple[int, int]:
+    """Decompress a single GDeflate stream, returning the input and output sizes"""
+    with map_input(input_path) as input_data:
+        comp_size = len(input_data)
+        decomp_size = gdeflate.get_uncompressed_size(input_data)
+        if decomp_size == 0:
+            raise GDeflateError("Decompression failed")
+        
+        # Decompress straight into the mapped output file
+        with create_output(output_path) as f:
+            with map_output(f, decomp_size) as output:
+                gdeflate.decompress_into(output, input_data, num_workers=num_workers)
     
+    return comp_size, decomp_size
+
+@contextmanager
+def exit_on_error():
+    """Report a failure on stderr and exit with status 1"""
     try:
-        gdeflate = GDeflate(args.dll)
-        
-        if args.compress:
-            compress_file(gdeflate, args.input, args.output, args.level)
-        else:
-            decompress_file(gdeflate, args.input, args.output, args.workers)
-            
+        yield
     except GDeflateError as e:
         print(f"GDeflate error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -111,5 +218,100 @@ def main() -> None:
         print(f"Unexpected error: {e}", file=sys.stderr)
         sys.exit(1)
 
+def run(gdeflate: GDeflate, args: argparse.Namespace) -> None:
+    """Compress or decompress a single file as described by args"""
+    with exit_on_error():
+        if args.compress:
+            compress_file(gdeflate, args.input, args.output, args.level,
+                          args.chunk_size if args.chunked else None, args.quiet)
+        else:
+            decompress_file(gdeflate, args.input, args.output, args.workers or None,
+                            args.chunked, args.quiet)
+
+# Requests and responses are JSON rather than pickles, so a client can never
+# make the server run arbitrary code. A connected client can still make the
+# server read and write any file it has access to, so both sides must share
+# GDEFLATE_SERVER_KEY and clients are authenticated with it.
+def server_authkey() -> Optional[bytes]:
+    key = os.environ.get("GDEFLATE_SERVER_KEY")
+    return key.encode() if key else None
+
+@contextmanager
+def working_directory(path: str):
+    """Temporarily change the current directory"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def handle_request(gdeflate: GDeflate, request: dict) -> dict:
+    """Run one client request, capturing its output and exit status"""
+    cwd = request.pop("cwd")
+    args = argparse.Namespace(**request)
+    args.input = Path(args.input)
+    args.output = Path(args.output)
+    
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            # Requests are handled one at a time, so running each one in the
+            # client's directory resolves and prints paths just like a local run
+            with exit_on_error(), working_directory(cwd):
+                run(gdeflate, args)
+        except SystemExit as e:
+            exit_code = e.code or 0
+    
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+def serve(gdeflate: GDeflate, address: str) -> None:
+    """Handle requests from --client invocations until interrupted"""
+    with Listener(address, authkey=server_authkey()) as listener:
+        print(f"Serving on {address}")
+        while True:
+            try:
+                with listener.accept() as connection:
+                    request = json.loads(connection.recv_bytes())
+                    connection.send_bytes(json.dumps(handle_request(gdeflate, request)).encode())
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                # A misbehaving client must not take the server down
+                print(f"Dropped request: {e}", file=sys.stderr)
+
+def send_request(address: str, args: argparse.Namespace) -> int:
+    """Forward a request to a --serve process, returning its exit status"""
+    request = {key: value for key, value in vars(args).items()
+               if key not in ("serve", "client", "dll")}
+    request["input"] = str(args.input)
+    request["output"] = str(args.output)
+    # The server may run in a different working directory
+    request["cwd"] = os.getcwd()
+    
+    with Client(address, authkey=server_authkey()) as connection:
+        connection.send_bytes(json.dumps(request).encode())
+        response = json.loads(connection.recv_bytes())
+    
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+def main() -> None:
+    args = parse_args()
+    
+    with exit_on_error():
+        if args.client is not None:
+            sys.exit(send_request(args.client, args))
+        
+        gdeflate = GDeflate(args.dll)
+        
+        if args.serve is not None:
+            serve(gdeflate, args.serve)
+        else:
+            run(gdeflate, args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file